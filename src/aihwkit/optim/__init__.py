@@ -9,3 +9,4 @@
 # Convenience imports for easier access to the classes.
 
 from aihwkit.optim.analog_optimizer import AnalogOptimizer, AnalogSGD, AnalogAdam
+from aihwkit.optim.context import clear_trace_buffers
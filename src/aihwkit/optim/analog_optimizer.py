@@ -9,7 +9,6 @@
 from types import new_class
 from typing import Any, Callable, Dict, Optional, Type
 
-from torch import cat
 from torch.optim import Optimizer, SGD, Adam
 from torch.autograd import no_grad
 
@@ -104,35 +103,7 @@ class AnalogOptimizerMixin:
                     if learning_rate is not None:
                         analog_tile.set_learning_rate(learning_rate)
 
-                    runtime = analog_tile.get_runtime()
-                    if analog_ctx.use_indexed:
-                        for x_input, d_input in zip(
-                            analog_ctx.analog_input, analog_ctx.analog_grad_output
-                        ):
-                            analog_tile.update_indexed(
-                                (
-                                    x_input.to(analog_tile.device)
-                                    if runtime.offload_input
-                                    else x_input
-                                ),
-                                (
-                                    d_input.to(analog_tile.device)
-                                    if runtime.offload_gradient
-                                    else d_input
-                                ),
-                            )
-                    else:
-                        x_input = cat(
-                            analog_ctx.analog_input, axis=-1 if analog_tile.in_trans else 0
-                        )
-                        d_input = cat(
-                            analog_ctx.analog_grad_output, axis=-1 if analog_tile.out_trans else 0
-                        )
-                        analog_tile.update(
-                            x_input.to(analog_tile.device) if runtime.offload_input else x_input,
-                            d_input.to(analog_tile.device) if runtime.offload_gradient else d_input,
-                        )
-
+                    analog_ctx.bulk_update()
                     analog_ctx.reset()
 
         # Apply post-update step operations (diffuse, decay, etc).
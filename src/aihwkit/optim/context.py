@@ -8,11 +8,15 @@
 
 # pylint: disable=attribute-defined-outside-init
 
-from typing import Optional, Type, Union, Any, List, TYPE_CHECKING
+from dataclasses import dataclass
+from typing import Optional, Type, Union, Any, Dict, List, Tuple, TYPE_CHECKING, cast
 
-from torch import dtype, Tensor
+from torch import dtype, Tensor, cat, empty, contiguous_format
 from torch._C import DisableTorchFunction
+from torch._C._nn import _parse_to
 from torch.nn import Parameter
+from torch.cuda import Event, Stream, current_stream
+from torch.cuda import stream as cuda_stream
 from torch import device as torch_device
 from torch.utils._pytree import tree_map
 
@@ -24,9 +28,11 @@ from aihwkit.optim.weight_view import (
     _raise_placeholder_read_error,
 )
 from aihwkit.simulator.parameters.enums import AnalogContextDataViewMode
+from aihwkit.simulator.parameters.runtime import RuntimeParameter
 
 if TYPE_CHECKING:
     from aihwkit.simulator.tiles.base import SimulatorTileWrapper
+    from aihwkit.simulator.tiles.periphery import TileWithPeriphery
 
 
 # Tensor properties that materialize weight values (transpose / conjugate views
@@ -37,6 +43,240 @@ if TYPE_CHECKING:
 _VALUE_VIEW_PROPERTIES = ("T", "mT", "H", "mH", "real", "imag")
 
 
+def _merge_steps(stack: Tensor, trans: bool = False) -> Tensor:
+    """Fold the leading step axis of a stacked trace into the batch axis.
+
+    This is equivalent to concatenating the individual steps along the
+    batch dimension, which is the first dimension, or the last one in
+    case of transposed inputs.
+
+    Args:
+        stack: ``[steps, ...]`` stacked trace tensor.
+        trans: whether the steps are transposed (batch last).
+
+    Returns:
+        The steps concatenated along the batch dimension.
+    """
+    if trans:
+        return stack.movedim(0, -2).flatten(-2)
+    return stack.flatten(0, 1)
+
+
+def _to_host(
+    tensor: Tensor, dtype_: Optional[dtype] = None, stream: Optional[Stream] = None
+) -> Tuple[Tensor, Optional[Event]]:
+    """Copy a tensor asynchronously into page-locked host memory.
+
+    Args:
+        tensor: tensor to copy.
+        dtype_: data type of the host tensor. Defaults to the data type
+            of ``tensor``. The cast is done on the device before the
+            transfer.
+        stream: CUDA stream to copy on, so that the copy overlaps with
+            the work queued afterwards on the current stream. If not
+            given, the current stream is used.
+
+    Returns:
+        Tuple of the host tensor and the event to synchronize on before
+        the host tensor is read (``None`` if ``tensor`` is on CPU already).
+
+    Note:
+        The host tensor is not taken from the trace buffer pool: the
+        offloaded input is saved for the backward pass and freed with the
+        autograd graph, which the context does not know about. Its
+        page-locked memory is recycled by the caching host allocator of
+        PyTorch instead.
+    """
+    if not tensor.is_cuda:
+        return tensor, None
+    host = empty(tensor.shape, dtype=dtype_ or tensor.dtype, pin_memory=True)
+    return host, _copy_to_host(host, tensor, stream)
+
+
+def _copy_to_host(host: Tensor, tensor: Tensor, stream: Optional[Stream] = None) -> Event:
+    """Copy a CUDA tensor asynchronously into page-locked host memory.
+
+    Args:
+        host: page-locked host tensor to copy into.
+        tensor: CUDA tensor to copy.
+        stream: CUDA stream to copy on (see ``_to_host``).
+
+    Returns:
+        The event to synchronize on before ``host`` is read.
+    """
+    event = Event()
+    if stream is None:
+        host.copy_(tensor, non_blocking=True)
+        event.record()
+        return event
+
+    stream.wait_stream(current_stream(tensor.device))
+    with cuda_stream(stream):
+        host.copy_(tensor, non_blocking=True)
+        event.record(stream)
+    # The memory of ``tensor`` must not be re-used before the copy is done.
+    tensor.record_stream(stream)
+    return event
+
+
+def _fits_trace(
+    buffer: Tensor,
+    value: Tensor,
+    dtype_: Optional[dtype] = None,
+    device: Optional[torch_device] = None,
+) -> bool:
+    """Whether ``value`` can be stored as one step of the trace ``buffer``.
+
+    The data type and device of the buffer default to the ones of ``value``.
+    """
+    return (
+        buffer.shape[1:] == value.shape
+        and buffer.dtype == (dtype_ or value.dtype)
+        and buffer.device == (device or value.device)
+    )
+
+
+class _BufferPool:
+    """Pool of released buffers, keyed by shape, data type and device.
+
+    Trace buffers that are outgrown are kept here for re-use by the next
+    request of the same layout, e.g. by another layer of the same size,
+    instead of being freed and allocated again.
+
+    Args:
+        max_bytes: maximal number of bytes kept in the pool per device
+            (page-locked host memory counts separately). Further
+            released buffers are freed.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024**2):
+        self.max_bytes = max_bytes
+        self._free = {}  # type: Dict[Tuple, List[Tensor]]
+        self._bytes = {}  # type: Dict[Tuple[torch_device, bool], int]
+
+    @staticmethod
+    def _key(shape: Tuple[int, ...], dtype_: dtype, device: torch_device, pinned: bool) -> Tuple:
+        return (tuple(shape), dtype_, device, pinned)
+
+    def acquire(
+        self,
+        shape: Tuple[int, ...],
+        dtype_: dtype,
+        device: torch_device,
+        pin_memory: bool = False,
+    ) -> Tensor:
+        """Return an uninitialized contiguous buffer, re-using a released one if possible.
+
+        Args:
+            shape: shape of the buffer.
+            dtype_: data type of the buffer.
+            device: device of the buffer.
+            pin_memory: whether a host buffer is page-locked.
+
+        Returns:
+            The buffer.
+        """
+        buffers = self._free.get(self._key(shape, dtype_, device, pin_memory))
+        if buffers:
+            buffer = buffers.pop()
+            self._bytes[(device, pin_memory)] -= buffer.nbytes
+            return buffer
+        return empty(
+            shape,
+            dtype=dtype_,
+            device=device,
+            pin_memory=pin_memory,
+            memory_format=contiguous_format,
+        )
+
+    def release(self, buffer: Optional[Tensor]) -> None:
+        """Hand a buffer back to the pool.
+
+        The buffer must not be used by the caller afterwards. The pool
+        does not track streams and is shared by all devices, so pending
+        asynchronous copies from or into the buffer (e.g. into a
+        page-locked host buffer) have to be synchronized on before.
+
+        Args:
+            buffer: buffer to release. Ignored if ``None``.
+        """
+        if buffer is None:
+            return
+        pinned = not buffer.is_cuda and buffer.is_pinned()
+        size = self._bytes.get((buffer.device, pinned), 0) + buffer.nbytes
+        if size > self.max_bytes:
+            return
+        key = self._key(buffer.shape, buffer.dtype, buffer.device, pinned)
+        self._free.setdefault(key, []).append(buffer)
+        self._bytes[(buffer.device, pinned)] = size
+
+    def clear(self, device: Optional[torch_device] = None) -> None:
+        """Free the buffers of the pool.
+
+        Args:
+            device: only free the buffers of this device (all if ``None``).
+        """
+        if device is None:
+            self._free.clear()
+            self._bytes.clear()
+            return
+        for key in [key for key in self._free if key[2] == device]:
+            del self._free[key]
+        for key in [key for key in self._bytes if key[0] == device]:
+            del self._bytes[key]
+
+
+_TRACE_BUFFER_POOL = _BufferPool()
+
+_HOST = torch_device("cpu")
+
+
+def clear_trace_buffers(device: Optional[Union[torch_device, str]] = None) -> None:
+    """Free the gradient trace buffers that are kept for re-use.
+
+    The analog contexts release their trace buffers to a pool on every
+    optimizer step, which keeps up to 64 MiB per device (and as much
+    page-locked host memory). Call this function before
+    ``torch.cuda.empty_cache()`` to give that memory back, e.g. after
+    training.
+
+    Args:
+        device: only free the buffers of this device (all if ``None``).
+    """
+    _TRACE_BUFFER_POOL.clear(None if device is None else torch_device(device))
+
+
+def _acquire_like(tensor: Tensor, shape: Tuple[int, ...]) -> Tensor:
+    """Acquire a trace buffer from the pool with the layout of ``tensor``.
+
+    The data type, device and page-locking of ``tensor`` are kept.
+    """
+    pin_memory = not tensor.is_cuda and tensor.is_pinned()
+    return _TRACE_BUFFER_POOL.acquire(shape, tensor.dtype, tensor.device, pin_memory)
+
+
+@dataclass(slots=True)
+class AnalogCtxState:
+    """State handed from ``AnalogFunction.forward`` to ``backward``.
+
+    One instance is kept per analog context and updated in place on
+    every forward pass, instead of setting the attributes on each
+    autograd context.
+    """
+
+    analog_ctx: "AnalogContext"
+    """Analog context of the tile."""
+
+    analog_tile: "SimulatorTileWrapper"
+    """The analog tile."""
+
+    shared_weights: Optional[Tensor] = None
+    """Shared weights of the tile if used for the update."""
+
+    runtime: Optional[RuntimeParameter] = None
+    """Runtime parameters of the tile."""
+
+
 class AnalogContext(Parameter):
     """Context for analog optimizer.
 
@@ -138,13 +378,20 @@ class AnalogContext(Parameter):
         self, analog_tile: "SimulatorTileWrapper", parameter: Optional[Parameter] = None
     ):  # pylint: disable=unused-argument
         super().__init__()
-        self.analog_tile = analog_tile
         self.use_torch_update = False
         self.use_indexed = False
         self._data_view_mode = AnalogContextDataViewMode.PLACEHOLDER
         self._data_buffer = None  # type: Optional[Tensor]
-        self.analog_input = []  # type: list
-        self.analog_grad_output = []  # type: list
+        self._copy_stream = None  # type: Optional[Stream]
+        self._trace_input = None  # type: Optional[Tensor]
+        self._trace_grad = None  # type: Optional[Tensor]
+        self._trace_event = None  # type: Optional[Event]
+        # Stored steps of other shapes, see ``_reserve_trace``.
+        self._trace_chunks = []  # type: List[Tuple[Tensor, Tensor]]
+        self._trace_len = 0
+        self._trace_capacity = 1
+        self._tile_device = None  # type: Optional[torch_device]
+        # Sets the tile pointer, the (empty) trace and the passes.
         self.reset(analog_tile)
 
     @classmethod
@@ -392,6 +639,16 @@ class AnalogContext(Parameter):
         """Replace the internal raw ``Parameter.data`` for tile rebinding."""
         if isinstance(data, (ReadOnlyWeightView, PlaceholderDataView)):
             data = data.as_subclass(Tensor)
+        raw = self._raw_data()
+        if data is raw or (
+            data.data_ptr() == raw.data_ptr()
+            and data.device == raw.device
+            and data.dtype == raw.dtype
+            and data.shape == raw.shape
+            and data.stride() == raw.stride()
+        ):
+            # Already bound to the same view of the same storage.
+            return
         with DisableTorchFunction():  # pylint: disable=not-context-manager
             super().__setattr__("data", data)
 
@@ -410,6 +667,21 @@ class AnalogContext(Parameter):
     def set_indexed(self, value: bool = True) -> None:
         """Set the context to forward_indexed."""
         self.use_indexed = value
+        self._bind_passes()
+
+    def _bind_passes(self) -> None:
+        """Bind the tile forward and backward passes of the current mode.
+
+        ``AnalogFunction`` calls these directly instead of checking
+        ``use_indexed`` on every step.
+        """
+        analog_tile = cast("TileWithPeriphery", self.analog_tile)
+        if self.use_indexed:
+            self._fwd = analog_tile.joint_forward_indexed
+            self._bwd = analog_tile.backward_indexed
+        else:
+            self._fwd = analog_tile.joint_forward
+            self._bwd = analog_tile.backward
 
     def get_data(self) -> Tensor:
         """Get a detached tensor from the active public data view."""
@@ -418,18 +690,285 @@ class AnalogContext(Parameter):
         return self.data.detach()
 
     def reset(self, analog_tile: Optional["SimulatorTileWrapper"] = None) -> None:
-        """Reset the gradient trace and optionally sets the tile pointer."""
+        """Reset the gradient trace and optionally sets the tile pointer.
+
+        The trace buffers are released to the buffer pool, from which
+        the next steps take them again. If the tile pointer is (re)set
+        after the tile was moved to another device, the pooled buffers
+        of the old device are freed.
+        """
 
         if analog_tile is not None:
             self.analog_tile = analog_tile
             self.analog_tile.analog_ctx = self
+            self._state = AnalogCtxState(self, analog_tile)
+            self._bind_passes()
 
-        self.analog_input = []
-        self.analog_grad_output = []
+        self._release_trace()
+        if analog_tile is not None:
+            device = self._raw_data().device
+            if self._tile_device is not None and self._tile_device != device:
+                # Free the buffers of the old device, so that the memory
+                # can be reclaimed.
+                _TRACE_BUFFER_POOL.clear(self._tile_device)
+            self._tile_device = device
+
+    def offload(
+        self, tensor: Tensor, dtype_: Optional[dtype] = None
+    ) -> Tuple[Tensor, Optional[Event]]:
+        """Copy a tensor of the gradient trace to host memory.
+
+        CUDA tensors are copied on a dedicated stream of this context,
+        so that the transfer overlaps with the following computations.
+
+        Args:
+            tensor: tensor to offload.
+            dtype_: data type of the host tensor (see ``RuntimeParameter``).
+
+        Returns:
+            Tuple of the host tensor and the event to synchronize on before
+            the host tensor is read (``None`` if ``tensor`` is on CPU already).
+        """
+        if not tensor.is_cuda:
+            return tensor, None
+        return _to_host(tensor, dtype_, self._get_copy_stream(tensor.device))
+
+    def _get_copy_stream(self, device: torch_device) -> Stream:
+        """Return the stream for copies to the host, created on first use."""
+        stream = self._copy_stream
+        if stream is None or stream.device != device:
+            stream = self._copy_stream = Stream(device)
+        return stream
+
+    def _wait_trace(self) -> None:
+        """Wait for pending copies of gradients into the host trace buffer."""
+        event = self._trace_event
+        if event is not None:
+            event.synchronize()
+            self._trace_event = None
+
+    def bulk_update(self) -> None:
+        """Update the tile with the stored gradient trace in a single call.
+
+        No-op if no step is stored.
+
+        Offloaded parts of the trace are moved back to the tile device first.
+        The host buffers are released on :meth:`reset` only once these
+        copies are done.
+        """
+        x_inputs = self.analog_input
+        d_inputs = self.analog_grad_output
+        if x_inputs is None or d_inputs is None:
+            return
+        analog_tile = self.analog_tile
+        runtime = analog_tile.get_runtime()
+        if runtime.offload_input:
+            x_inputs = x_inputs.to(
+                analog_tile.device, dtype=analog_tile.get_dtype(), non_blocking=True
+            )
+        if runtime.offload_gradient:
+            d_inputs = d_inputs.to(
+                analog_tile.device, dtype=analog_tile.get_dtype(), non_blocking=True
+            )
+        if analog_tile.is_cuda and (runtime.offload_input or runtime.offload_gradient):
+            self._trace_event = Event()
+            self._trace_event.record()
+        analog_tile.update_batched(x_inputs, d_inputs, self.use_indexed)
 
     def has_gradient(self) -> bool:
         """Return whether a gradient trace was stored."""
-        return len(self.analog_input) > 0
+        return self._trace_len > 0
+
+    @property
+    def analog_input(self) -> Optional[Tensor]:
+        """Stored forward inputs of the gradient trace as ``[steps, ...]`` tensor.
+
+        ``None`` if no step is stored. Steps of different shapes (e.g. a
+        smaller last batch) are concatenated along the batch dimension
+        into a single step.
+
+        Caution:
+            The returned tensor is usually a view of the trace buffers.
+            It is only valid until the next :meth:`reset`, which hands
+            the buffers on to the next steps, possibly of another layer.
+            Clone it to keep the values.
+        """
+        if self._trace_len == 0:
+            return None
+        return self._stacked_trace(0, self.analog_tile.in_trans)
+
+    @property
+    def analog_grad_output(self) -> Optional[Tensor]:
+        """Stored backward gradients of the gradient trace as ``[steps, ...]`` tensor.
+
+        ``None`` if no step is stored. Steps of different shapes are
+        concatenated as for :attr:`analog_input`.
+
+        Caution:
+            The returned tensor is usually a view of the trace buffers.
+            It is only valid until the next :meth:`reset`, which hands
+            the buffers on to the next steps, possibly of another layer.
+            Clone it to keep the values.
+        """
+        if self._trace_len == 0:
+            return None
+        self._wait_trace()
+        return self._stacked_trace(1, self.analog_tile.out_trans)
+
+    def _stacked_trace(self, part: int, trans: bool) -> Tensor:
+        """Return the stored input (``part=0``) or gradient (``part=1``) steps.
+
+        Earlier steps of other shapes are concatenated with the current
+        ones along the batch dimension (the last one if ``trans``).
+        """
+        buffer = self._trace_input if part == 0 else self._trace_grad
+        assert buffer is not None
+        steps = buffer[: self._trace_len]
+        if not self._trace_chunks:
+            return steps
+        merged = [_merge_steps(chunk[part], trans).to(steps) for chunk in self._trace_chunks]
+        merged.append(_merge_steps(steps, trans))
+        return cat(merged, dim=-1 if trans else 0).unsqueeze(0)
+
+    def store_trace(
+        self,
+        x_input: Tensor,
+        d_input: Tensor,
+        offload_gradient: bool = False,
+        offload_dtype: Optional[dtype] = None,
+    ) -> None:
+        """Append one step to the gradient trace used by the analog optimizer.
+
+        The inputs and gradients are copied into ``[steps, ...]``
+        buffers, which are taken from the buffer pool. Thus, while the
+        trace is stored, it holds one copy of the inputs and gradients
+        of each step, instead of references to the tensors saved for
+        the backward pass. :meth:`reset` releases the buffers to the
+        bounded buffer pool again (see :func:`clear_trace_buffers`).
+
+        Offloaded CUDA gradients are copied directly into the slot of a
+        page-locked host buffer on the copy stream of the context. The
+        copies are only waited for when the gradients are read.
+
+        Args:
+            x_input: forward input of the tile.
+            d_input: backward gradient input of the tile.
+            offload_gradient: whether to store the gradients on CPU.
+            offload_dtype: data type of the offloaded gradients
+                (defaults to the one of ``d_input``).
+        """
+        offload = offload_gradient and d_input.is_cuda
+        d_dtype = (offload_dtype or d_input.dtype) if offload else d_input.dtype
+        d_device = _HOST if offload else d_input.device
+
+        index = self._trace_len
+        x_buffer, d_buffer = self._trace_input, self._trace_grad
+        if (
+            x_buffer is None
+            or d_buffer is None
+            or index == x_buffer.size(0)
+            or not _fits_trace(x_buffer, x_input)
+            or not _fits_trace(d_buffer, d_input, d_dtype, d_device)
+        ):
+            x_buffer, d_buffer = self._reserve_trace(x_input, d_input, d_dtype, d_device)
+            index = self._trace_len
+
+        x_buffer[index].copy_(x_input, non_blocking=True)
+        if offload:
+            # The copy stream is in order, so the last event covers all steps.
+            self._trace_event = _copy_to_host(
+                d_buffer[index], d_input, self._get_copy_stream(d_input.device)
+            )
+        else:
+            d_buffer[index].copy_(d_input, non_blocking=True)
+        self._trace_len = index + 1
+
+    def _release_trace(self) -> None:
+        """Drop the stored steps and release the trace buffers to the pool."""
+        # Pending copies into the buffers have to finish before re-use.
+        self._wait_trace()
+        _TRACE_BUFFER_POOL.release(self._trace_input)
+        _TRACE_BUFFER_POOL.release(self._trace_grad)
+        self._trace_input = None
+        self._trace_grad = None
+        self._trace_chunks = []
+        self._trace_len = 0
+
+    def _reserve_trace(
+        self, x_input: Tensor, d_input: Tensor, d_dtype: dtype, d_device: torch_device
+    ) -> Tuple[Tensor, Tensor]:
+        """Make room in the trace buffers for one more step.
+
+        New buffers are sized for the number of steps of the previous
+        trace. If the trace is full, the number of steps is doubled. If
+        the new step does not match the stored steps (e.g. a smaller
+        last batch or another sequence length), the stored steps are
+        kept aside as a chunk and new buffers are started. The chunks
+        are concatenated along the batch dimension only once, when the
+        trace is read.
+
+        Args:
+            x_input: forward input of the tile.
+            d_input: backward gradient input of the tile.
+            d_dtype: data type of the gradient trace.
+            d_device: device of the gradient trace.
+
+        Returns:
+            Tuple of the input and gradient trace buffers.
+        """
+        length = self._trace_len
+        x_buffer, d_buffer = self._trace_input, self._trace_grad
+        capacity = self._trace_capacity
+
+        if x_buffer is not None and d_buffer is not None and length > 0:
+            if _fits_trace(x_buffer, x_input) and _fits_trace(
+                d_buffer, d_input, d_dtype, d_device
+            ):
+                # Trace is full: double the steps and keep the stored ones.
+                self._wait_trace()
+                capacity = self._trace_capacity = 2 * x_buffer.size(0)
+                x_new = _acquire_like(x_buffer, (capacity, *x_input.shape))
+                d_new = _acquire_like(d_buffer, (capacity, *d_input.shape))
+                x_new[:length].copy_(x_buffer[:length])
+                d_new[:length].copy_(d_buffer[:length])
+                _TRACE_BUFFER_POOL.release(x_buffer)
+                _TRACE_BUFFER_POOL.release(d_buffer)
+                self._trace_input, self._trace_grad = x_new, d_new
+                return x_new, d_new
+
+            # The buffers stay with the chunk and are freed on reset.
+            self._trace_chunks.append((x_buffer[:length], d_buffer[:length]))
+            self._trace_len = 0
+            capacity = 1
+        else:
+            _TRACE_BUFFER_POOL.release(x_buffer)
+            _TRACE_BUFFER_POOL.release(d_buffer)
+
+        x_new = _acquire_like(x_input, (capacity, *x_input.shape))
+        # Offloaded gradients are copied asynchronously into page-locked memory.
+        d_new = _TRACE_BUFFER_POOL.acquire(
+            (capacity, *d_input.shape), d_dtype, d_device, d_device != d_input.device
+        )
+        self._trace_input, self._trace_grad = x_new, d_new
+        return x_new, d_new
+
+    def __getstate__(self) -> Dict:
+        """Drop the gradient trace and the CUDA copy stream and event.
+
+        The context is pickled with the module parameters when the tile
+        is saved. Streams and events cannot be pickled, and the trace is
+        only needed until the next optimizer step.
+        """
+        state = self.__dict__.copy()
+        state.update(
+            _copy_stream=None,
+            _trace_event=None,
+            _trace_input=None,
+            _trace_grad=None,
+            _trace_chunks=[],
+            _trace_len=0,
+        )
+        return state
 
     def __copy__(self) -> Parameter:
         """Turn off copying of the pointers. Context will be re-created
@@ -456,7 +995,7 @@ class AnalogContext(Parameter):
         return self
 
     def cpu(self) -> "AnalogContext":
-        """Move the context to CPU.
+        """Move the context and its analog tile to CPU.
 
         Note:
             This is a no-op for CPU context.
@@ -464,41 +1003,44 @@ class AnalogContext(Parameter):
         Returns:
             self
         """
-        self._replace_raw_data(self._raw_data().cpu())
+        # The tile device is derived from the raw data, so the raw data is
+        # on CPU already if the tile is.
         if self.analog_tile is not None and self.analog_tile.is_cuda:
             self.analog_tile = self.analog_tile.cpu()
             self.reset(self.analog_tile)
+            # The tile might have bound a new context to its host weights.
+            self.analog_tile._sync_analog_ctx_weights()
         return self
 
     def to(self, *args: Any, **kwargs: Any) -> "AnalogContext":
         """Move analog tiles of the current context to a device.
 
-        Note:
-            Please be aware that moving analog tiles from GPU to CPU is
-            currently not supported.
-
         Caution:
-            Other tensor conversions than moving the device to CUDA,
-            such as changing the data type are not supported for analog
-            tiles and will be simply ignored.
+            Other tensor conversions than moving the device, such as
+            changing the data type, are only applied to the context and
+            not supported for analog tiles. The tile is moved for any
+            device argument, including the device of a given tensor.
 
         Returns:
             This module in the specified device.
         """
         # pylint: disable=invalid-name
-        self._replace_raw_data(self._raw_data().to(*args, **kwargs))
-        device = None
-        if "device" in kwargs:
-            device = kwargs["device"]
-        elif len(args) > 0 and not isinstance(args[0], (Tensor, dtype)):
-            device = torch_device(args[0])
-
+        device, dtype_, non_blocking, memory_format = _parse_to(*args, **kwargs)
+        # The tile device is derived from the raw data, so query it before
+        # the raw data is moved.
+        is_cuda = self.analog_tile.is_cuda
         if device is not None:
-            device = torch_device(device)
-            if device.type == "cuda" and not self.analog_tile.is_cuda:
+            if device.type == "cuda" and not is_cuda:
                 self.cuda(device)
-            elif device.type == "cpu" and self.analog_tile.is_cuda:
+            elif device.type == "cpu" and is_cuda:
                 self.cpu()
+
+        raw = self._raw_data()
+        data = raw.to(
+            device=device, dtype=dtype_, non_blocking=non_blocking, memory_format=memory_format
+        )
+        if data is not raw:
+            self._replace_raw_data(data)
         return self
 
     def __repr__(self) -> str:
@@ -21,6 +21,7 @@ from aihwkit.simulator.parameters import (
 )
 from aihwkit.simulator.parameters.enums import (
     RPUDataType,
+    OffloadDataType,
     BoundManagementType,
     NoiseManagementType,
     WeightNoiseType,
@@ -12,6 +12,7 @@
 from .enums import (
     AnalogContextDataViewMode,
     RPUDataType,
+    OffloadDataType,
     BoundManagementType,
     NoiseManagementType,
     WeightNoiseType,
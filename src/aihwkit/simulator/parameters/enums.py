@@ -9,9 +9,14 @@
 """Utility enumerators for resistive processing units."""
 
 from enum import Enum
-from torch import dtype, float32, float64, half
+from torch import dtype, float32, float64, half, bfloat16
 
-_TORCH_DATA_TYPE_MAP = {"float": float32, "double": float64, "half": half}
+_TORCH_DATA_TYPE_MAP = {
+    "float": float32,
+    "double": float64,
+    "half": half,
+    "bfloat16": bfloat16,
+}
 
 
 class RPUDataType(Enum):
@@ -37,6 +42,28 @@ class RPUDataType(Enum):
         return _TORCH_DATA_TYPE_MAP[self.value]
 
 
+class OffloadDataType(Enum):
+    """Data type of the inputs and gradients offloaded to CPU.
+
+    Note:
+
+        The stored inputs and gradients are cast to this data type on the
+        copy to CPU and cast back to the data type of the tile for the
+        update.
+    """
+
+    BFLOAT16 = "bfloat16"
+    """BFloat16 format (8 bit exponent, 7 bit mantissa).
+
+    Keeps the range of Float32, so that small gradients are not
+    flushed to zero.
+    """
+
+    def as_torch(self) -> dtype:
+        """Returns corresponding torch dtype."""
+        return _TORCH_DATA_TYPE_MAP[self.value]
+
+
 class AnalogContextDataViewMode(Enum):
     """Public data access mode for analog optimizer contexts."""
 
@@ -10,8 +10,9 @@
 """Runtime parameters for settings at simulation time."""
 
 from dataclasses import dataclass
+from typing import Optional
 from .helpers import _PrintableMixin
-from .enums import RPUDataType
+from .enums import RPUDataType, OffloadDataType
 
 
 @dataclass
@@ -57,3 +58,11 @@ class RuntimeParameter(_PrintableMixin):
     Note:
        Only for in case tiles are simulated with RPUCuda library.
     """
+
+    offload_dtype: Optional[OffloadDataType] = None
+    """Data type of the offloaded inputs and gradients on CPU.
+
+    Reduces the transfer and host memory of ``offload_input`` and
+    ``offload_gradient``. The update uses the values cast back to
+    ``data_type``. If ``None``, the data type of the tile is kept.
+    """
@@ -25,7 +25,7 @@ from aihwkit.simulator.parameters.mapping import MappingParameter
 from aihwkit.simulator.parameters.base import RPUConfigGeneric
 from aihwkit.simulator.parameters.runtime import RuntimeParameter
 from aihwkit.simulator.parameters.enums import RPUDataType
-from aihwkit.optim.context import AnalogContext
+from aihwkit.optim.context import AnalogContext, _merge_steps
 
 
 class TileModuleBase:
@@ -624,6 +624,25 @@ class SimulatorTileWrapper:
         (e.g. using pulse trains)."""
         raise NotImplementedError
 
+    def update_batched(self, x_inputs: Tensor, d_inputs: Tensor, use_indexed: bool = False) -> None:
+        """Update the tile with all stored steps in a single call.
+
+        The steps are folded into the batch dimension so that the whole
+        trace is handed to the simulator as one contiguous update.
+
+        Args:
+            x_inputs: ``[steps, ...]`` stacked input tensor (see ``update``).
+            d_inputs: ``[steps, ...]`` stacked error tensor (see ``update``).
+            use_indexed: whether to use the indexed update (``update_indexed``),
+                where the batch dimension is always the first one.
+        """
+        if use_indexed:
+            self.update_indexed(x_inputs.flatten(0, 1), d_inputs.flatten(0, 1))
+            return
+        self.update(
+            _merge_steps(x_inputs, self.in_trans), _merge_steps(d_inputs, self.out_trans)
+        )
+
     def get_analog_state(self) -> Dict:
         """Get the analog state for the state_dict.
 
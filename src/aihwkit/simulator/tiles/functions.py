@@ -8,9 +8,17 @@
 
 from typing import Any, Optional, Tuple
 
-from torch import Tensor, empty_like
+from torch import Tensor, dtype
 from torch.autograd import Function, no_grad
 from aihwkit.optim.context import AnalogContext
+from aihwkit.simulator.parameters.runtime import RuntimeParameter
+
+
+def _offload_dtype(runtime: RuntimeParameter) -> Optional[dtype]:
+    """Return the torch data type of offloaded tensors (``None`` to keep it)."""
+    if runtime.offload_dtype is None:
+        return None
+    return runtime.offload_dtype.as_torch()
 
 
 class AnalogFunction(Function):
@@ -35,31 +43,30 @@ class AnalogFunction(Function):
         # `ctx` is the parameter required by PyTorch to store the context
         # no need to pass it through ```AnalogFunction.apply(...)````.
         # Store in context for using during `backward()`.
-        ctx.analog_ctx = analog_ctx
-        ctx.analog_tile = analog_tile
-        ctx.shared_weights = None
-        ctx.saved_analog_tensors = [input_]
-        runtime = analog_tile.get_runtime()
-
-        use_indexed = analog_ctx.use_indexed
-        if shared_weights is not None:
-            ctx.shared_weights = shared_weights
+        ctx.state = state = analog_ctx._state
+        state.shared_weights = shared_weights
+        ctx.offload_event = None
+        # The periphery appends further tensors (e.g. the gradient mask)
+        # during the forward pass and reads them back in backward.
+        ctx.saved_analog_tensors = saved = [input_]
+        # Resolved once per step; backward reuses the same settings.
+        state.runtime = runtime = analog_tile.get_runtime()
+
+        use_torch_update = shared_weights is not None
+        if use_torch_update:
             analog_tile.ensure_shared_weights(shared_weights)
-            analog_ctx.use_torch_update = True
-        else:
-            analog_ctx.use_torch_update = False
+        if analog_ctx.use_torch_update is not use_torch_update:
+            # Fixed for a tile in practice, so only written on a change.
+            analog_ctx.use_torch_update = use_torch_update
 
         # Invoke the forward pass in the tile instance.
-        if use_indexed:
-            out = analog_tile.joint_forward_indexed(input_, is_test, ctx)
-        else:
-            out = analog_tile.joint_forward(input_, is_test, ctx)
+        out = analog_ctx._fwd(input_, is_test, ctx)
 
         if runtime.offload_input:
-            ctx.saved_analog_tensors[0] = ctx.saved_analog_tensors[0].cpu()
+            saved[0], ctx.offload_event = analog_ctx.offload(input_, _offload_dtype(runtime))
 
-        ctx.save_for_backward(*ctx.saved_analog_tensors)
-        ctx.saved_analog_tensors = []
+        ctx.save_for_backward(*saved)
+        del ctx.saved_analog_tensors
         return out
 
     @staticmethod
@@ -70,45 +77,40 @@ class AnalogFunction(Function):
         Optional[Tensor], Optional[Tensor], Optional[Tensor], Optional[Tensor], Optional[Tensor]
     ]:
         """Execute the backward pass in the analog tile."""
-        analog_ctx = ctx.analog_ctx
-        analog_tile = ctx.analog_tile
-        ctx.saved_analog_tensors = ctx.saved_tensors
-        input_ = ctx.saved_analog_tensors[0]
-        runtime = analog_tile.get_runtime()
+        state = ctx.state
+        analog_ctx = state.analog_ctx
+        analog_tile = state.analog_tile
+        if ctx.offload_event is not None:
+            # Wait only for the offload copy, not for the whole device. The
+            # host input is read directly, so the host has to wait as well.
+            ctx.offload_event.synchronize()
+        ctx.saved_analog_tensors = saved = ctx.saved_tensors
+        input_ = saved[0]
+        runtime = state.runtime
 
         shared_weights_grad = None
-        use_indexed = analog_ctx.use_indexed
 
-        if ctx.shared_weights is not None:
-            analog_tile.ensure_shared_weights(ctx.shared_weights)
+        if state.shared_weights is not None:
+            analog_tile.ensure_shared_weights(state.shared_weights)
 
         # Call the backward function in the tile instance.
-        if use_indexed:
-            grad_input = analog_tile.backward_indexed(grad_output, ctx)
-        else:
-            grad_input = analog_tile.backward(grad_output, ctx)
+        grad_input = analog_ctx._bwd(grad_output, ctx)
 
         if analog_ctx.use_torch_update:
             if runtime.offload_input:
-                input_ = input_.to(analog_tile.device)
+                input_ = input_.to(
+                    analog_tile.device, dtype=analog_tile.get_dtype(), non_blocking=True
+                )
 
             # Grad computed directly (for inference training)
-            shared_weights_grad = empty_like(ctx.shared_weights)
-            analog_tile.set_delta_weights(shared_weights_grad)
-            if use_indexed:
-                analog_tile.update_indexed(input_, grad_output)
-            else:
-                analog_tile.update(input_, grad_output)
-            analog_tile.reset_delta_weights()
+            shared_weights_grad = analog_tile.compute_shared_weights_grad(
+                input_, grad_output, analog_ctx.use_indexed
+            )
         else:
             # Store activation and errors for optimizer (for analog training)
-            analog_ctx.analog_input.append(input_)
-
-            if runtime.offload_gradient:
-                store_gradients = grad_output.cpu()
-            else:
-                store_gradients = grad_output
-            analog_ctx.analog_grad_output.append(store_gradients)
+            analog_ctx.store_trace(
+                input_, grad_output, runtime.offload_gradient, _offload_dtype(runtime)
+            )
 
-        ctx.saved_analog_tensors = []
+        del ctx.saved_analog_tensors
         return None, None, grad_input, shared_weights_grad, None
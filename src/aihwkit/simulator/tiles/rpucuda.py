@@ -8,7 +8,7 @@
 
 from typing import Optional, Union, Dict, Tuple, Any
 
-from torch import Tensor, zeros, tensor
+from torch import Tensor, zeros, tensor, empty_like
 from torch import device as torch_device
 from torch.nn import Parameter
 from torch.cuda import device as cuda_device
@@ -169,7 +169,9 @@ class RPUCudaSimulatorTileWrapper(SimulatorTileWrapper):
                 self.tile = MAP_TILE_CLASS_TO_CUDA[self.tile.__class__](self.tile)
                 # CPU shared tensor is no longer valid for the new CUDA tile.
                 self._shared_weight_tensor = None
-                self.analog_ctx._replace_raw_data(self.tile.get_weights().cuda(device))
+                # Read on the device (``get_weights_cuda``) if supported,
+                # avoiding the D2H round trip of ``get_weights``.
+                self.analog_ctx._replace_raw_data(self._get_tile_weights_ref().to(device))
                 self.analog_ctx.reset(self)  # type: ignore
                 # Re-establish shared weight binding for the new CUDA tile,
                 # but only when not using the shared_weights DDP path. When
@@ -215,16 +217,25 @@ class RPUCudaSimulatorTileWrapper(SimulatorTileWrapper):
         Caution:
            This is only called from analog function.
 
-        No-op if shared weights is not used.
+        No-op if shared weights is not used or the tile is already bound to
+        the storage of the shared weights (e.g. in backward after forward).
         """
-        if shared_weights is not None:
+        if shared_weights is not None and shared_weights is not self.shared_weights:
             self.shared_weights.data = shared_weights.data  # type: ignore
 
         if self.shared_weights is not None:
-            self.tile.set_shared_weights(self.shared_weights.data)  # type: ignore
+            data = self.shared_weights.data
+            current = self._shared_weight_tensor
+            if (
+                current is not None
+                and current.data_ptr() == data.data_ptr()
+                and current.device == data.device
+            ):
+                return
+            self.tile.set_shared_weights(data)  # type: ignore
             # Keep _shared_weight_tensor in sync: the RPUCuda shared_weights
             # path replaces the C++ tile's backing store.
-            self._shared_weight_tensor = self.shared_weights.data
+            self._shared_weight_tensor = data
 
     @no_grad()
     def set_delta_weights(self, delta_weights: Optional[Tensor] = None) -> None:
@@ -245,6 +256,39 @@ class RPUCudaSimulatorTileWrapper(SimulatorTileWrapper):
         if self.shared_weights is not None:
             self.tile.reset_delta_weights()
 
+    @no_grad()
+    def compute_shared_weights_grad(
+        self, x_input: Tensor, d_input: Tensor, use_indexed: bool = False
+    ) -> Tensor:
+        """Compute the gradient of the shared weights.
+
+        The (perfect) update of the tile is redirected to a delta
+        weights tensor, which is returned instead of being applied to
+        the weights. Used for hardware-aware training.
+
+        Caution:
+           This is only called from analog function.
+
+        Args:
+            x_input: forward input of the tile.
+            d_input: backward gradient input of the tile.
+            use_indexed: whether to use the indexed update.
+
+        Returns:
+            The delta weights tensor with the shape of the shared weights.
+        """
+        # A new tensor is needed each time: autograd might still hold
+        # the previous one, e.g. when the tile is used more than once
+        # in the same graph (as in recurrent layers).
+        delta_weights = empty_like(self.shared_weights)
+        self.tile.set_delta_weights(delta_weights)
+        if use_indexed:
+            self.update_indexed(x_input, d_input)
+        else:
+            self.update(x_input, d_input)
+        self.tile.reset_delta_weights()
+        return delta_weights
+
     def get_hidden_update_index(self) -> int:
         """Get the current updated device index of the hidden devices.
 
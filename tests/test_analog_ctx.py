@@ -11,19 +11,21 @@ Verifies the public AnalogContext data modes: metadata-only placeholder,
 read-only logical data view, and independent digital buffer.
 """
 
+from tempfile import TemporaryFile
 from unittest import SkipTest
 
 import torch
-from torch import zeros, randn, rand_like, allclose, Tensor, Size, device, manual_seed
+from torch import zeros, randn, rand_like, allclose, cat, Tensor, Size, device, manual_seed
 from torch.cuda import device_count, device as cuda_device
 from torch.nn import Parameter
 from torch.nn import Linear as TorchLinear, Sequential, Conv2d as TorchConv2d
 
 from aihwkit.nn import AnalogLinear, AnalogConv2d
 from aihwkit.nn.conversion import convert_to_analog
-from aihwkit.optim.context import AnalogContext
+from aihwkit.optim import AnalogSGD, clear_trace_buffers
+from aihwkit.optim.context import AnalogContext, _BufferPool, _TRACE_BUFFER_POOL
 from aihwkit.optim.weight_view import ReadOnlyWeightView
-from aihwkit.simulator.parameters.enums import AnalogContextDataViewMode
+from aihwkit.simulator.parameters.enums import AnalogContextDataViewMode, OffloadDataType
 from aihwkit.simulator.configs import (
     FloatingPointRPUConfig,
     InferenceRPUConfig,
@@ -1527,9 +1529,7 @@ class AnalogCtxRequiresGradBackwardTest(ParametrizedTestCase):
                 ctx.requires_grad = False
                 _, has_grad, alpha_grad, ctx_grad = self._fwd_bwd(model, ctx, alpha)
                 self.assertFalse(has_grad, "forward signal must NOT be recorded when frozen")
-                self.assertEqual(
-                    len(ctx.analog_grad_output), 0, "no backward signal when frozen"
-                )
+                self.assertIsNone(ctx.analog_grad_output, "no backward signal when frozen")
                 self.assertIsNotNone(alpha_grad, "downstream digital param must still get grad")
                 self.assertIsNone(ctx_grad, "ctx.grad must stay None when frozen")
 
@@ -1543,7 +1543,7 @@ class AnalogCtxRequiresGradBackwardTest(ParametrizedTestCase):
                 ctx.requires_grad = False
                 _, has_grad, alpha_grad, ctx_grad = self._fwd_bwd(model, ctx, alpha)
                 self.assertFalse(has_grad)
-                self.assertEqual(len(ctx.analog_grad_output), 0, "no backward signal when frozen")
+                self.assertIsNone(ctx.analog_grad_output, "no backward signal when frozen")
                 self.assertIsNotNone(alpha_grad)
                 self.assertIsNone(ctx_grad, "ctx.grad must stay None when frozen")
 
@@ -1874,3 +1874,431 @@ class AnalogCtxRequiresGradMethodTest(ParametrizedTestCase):
                 self.assertFalse(ctx.requires_grad)
                 ctx.requires_grad_(True)
                 self.assertTrue(ctx.requires_grad)
+
+
+class SharedWeightsGradTest(ParametrizedTestCase):
+    """The gradient of the shared weights is a new tensor on every backward."""
+
+    use_cuda = False
+
+    @staticmethod
+    def _model_tile():
+        model = AnalogLinear(4, 3, bias=False, rpu_config=InferenceRPUConfig())
+        return model, next(model.analog_tiles())
+
+    def test_grad_accumulates_over_uses_in_one_graph(self):
+        """A tile used twice in a graph (as in recurrent layers) gets the summed gradient."""
+        model, tile = self._model_tile()
+        inputs = [randn(2, 4), randn(2, 4)]
+        grads = []
+        for x in inputs:
+            model.zero_grad()
+            model(x).sum().backward()
+            grads.append(tile.shared_weights.grad.clone())
+
+        model.zero_grad()
+        (model(inputs[0]).sum() + model(inputs[1]).sum()).backward()
+        self.assertTrue(allclose(tile.shared_weights.grad, grads[0] + grads[1], atol=1e-6))
+
+    def test_returned_grad_is_not_overwritten(self):
+        """Gradients returned by autograd.grad are not recycled by later backward passes."""
+        model, tile = self._model_tile()
+        x = randn(2, 4)
+        grad = torch.autograd.grad(model(x).sum(), tile.shared_weights)[0]
+        expected = grad.clone()
+
+        for _ in range(2):
+            torch.autograd.grad(model(randn(2, 4)).sum(), tile.shared_weights)
+        self.assertTrue(allclose(grad, expected))
+
+
+class SharedWeightsRebindTest(ParametrizedTestCase):
+    """``ensure_shared_weights`` only rebinds the tile for new storage."""
+
+    use_cuda = False
+
+    def test_ensure_shared_weights_skips_bound_storage(self):
+        """The tile is not rebound to the shared weights it already uses."""
+        model = AnalogLinear(4, 3, bias=False, rpu_config=InferenceRPUConfig())
+        tile = next(model.analog_tiles())
+        tile.ensure_shared_weights()
+        bound = tile._shared_weight_tensor
+
+        tile.ensure_shared_weights()
+        tile.ensure_shared_weights(tile.shared_weights)
+        self.assertIs(tile._shared_weight_tensor, bound)
+
+    def test_ensure_shared_weights_rebinds_new_storage(self):
+        """New shared weights storage is bound to the tile."""
+        model = AnalogLinear(4, 3, bias=False, rpu_config=InferenceRPUConfig())
+        tile = next(model.analog_tiles())
+        tile.ensure_shared_weights()
+        new_weights = tile.shared_weights.detach().clone()
+
+        tile.ensure_shared_weights(new_weights)
+        self.assertEqual(tile.shared_weights.data_ptr(), new_weights.data_ptr())
+        self.assertEqual(tile._shared_weight_tensor.data_ptr(), new_weights.data_ptr())
+
+
+class AnalogCtxGradientTraceTest(ParametrizedTestCase):
+    """The analog gradient trace is stored in re-used ``[steps, ...]`` buffers."""
+
+    use_cuda = False
+
+    @staticmethod
+    def _model_ctx():
+        model = AnalogLinear(4, 3, bias=False, rpu_config=FloatingPointRPUConfig())
+        return model, next(model.analog_tiles()).analog_ctx
+
+    def test_trace_stacks_steps(self):
+        """Each backward adds one step to the stacked trace."""
+        model, ctx = self._model_ctx()
+        inputs = [randn(2, 4) for _ in range(3)]
+        for x in inputs:
+            model(x).sum().backward()
+
+        self.assertTrue(ctx.has_gradient())
+        self.assertEqual(ctx.analog_input.shape, Size([3, 2, 4]))
+        self.assertEqual(ctx.analog_grad_output.shape, Size([3, 2, 3]))
+        for stored, x in zip(ctx.analog_input, inputs):
+            self.assertTrue(allclose(stored, x))
+
+    def test_trace_buffer_reused_after_reset(self):
+        """reset() empties the trace and the next steps take the released buffer again."""
+        model, ctx = self._model_ctx()
+        model(randn(2, 4)).sum().backward()
+        data_ptr = ctx.analog_input.data_ptr()
+
+        ctx.reset()
+        self.assertFalse(ctx.has_gradient())
+        self.assertIsNone(ctx.analog_input)
+
+        model(randn(2, 4)).sum().backward()
+        self.assertEqual(ctx.analog_input.data_ptr(), data_ptr)
+
+    def test_trace_merges_steps_of_different_batch_size(self):
+        """A step with a different batch size is merged along the batch dimension."""
+        model, ctx = self._model_ctx()
+        x_1, x_2 = randn(2, 4), randn(1, 4)
+        model(x_1).sum().backward()
+        model(x_2).sum().backward()
+
+        self.assertEqual(len(ctx.analog_input), 1)
+        self.assertTrue(allclose(ctx.analog_input[0], cat((x_1, x_2))))
+        self.assertEqual(ctx.analog_grad_output.shape, Size([1, 3, 3]))
+
+    def test_trace_keeps_steps_of_other_shapes_aside(self):
+        """Steps of another shape are kept as chunks and concatenated only when read."""
+        model, ctx = self._model_ctx()
+        inputs = [randn(2, 4) for _ in range(4)] + [randn(1, 4), randn(3, 4), randn(1, 4)]
+        for x in inputs:
+            model(x).sum().backward()
+
+        self.assertEqual(len(ctx._trace_chunks), 3)
+        self.assertEqual(ctx._trace_chunks[0][0].shape, Size([4, 2, 4]))
+        self.assertEqual(ctx.analog_input.shape, Size([1, 13, 4]))
+        self.assertEqual(ctx.analog_grad_output.shape, Size([1, 13, 3]))
+        self.assertTrue(allclose(ctx.analog_input[0], cat(inputs)))
+
+        ctx.reset()
+        self.assertEqual(ctx._trace_chunks, [])
+        self.assertIsNone(ctx._trace_input)
+        self.assertIsNone(ctx._trace_grad)
+
+    @staticmethod
+    def _offload_rpu_config(offload_dtype=None):
+        rpu_config = FloatingPointRPUConfig()
+        rpu_config.runtime.offload_input = True
+        rpu_config.runtime.offload_gradient = True
+        rpu_config.runtime.offload_dtype = offload_dtype
+        return rpu_config
+
+    def test_offload_dtype_keeps_cpu_trace(self):
+        """CPU tensors are not offloaded, so their data type is kept."""
+        rpu_config = self._offload_rpu_config(OffloadDataType.BFLOAT16)
+        model = AnalogLinear(4, 3, bias=False, rpu_config=rpu_config)
+        ctx = next(model.analog_tiles()).analog_ctx
+        x = randn(2, 4)
+        model(x).sum().backward()
+
+        self.assertEqual(ctx.analog_input.dtype, torch.float32)
+        self.assertEqual(ctx.analog_grad_output.dtype, torch.float32)
+        self.assertTrue(torch.equal(ctx.analog_input[0], x))
+
+    def test_offload_dtype_bfloat16_round_trip_cuda(self):
+        """Offloaded BFloat16 traces hold the rounded values and update like them."""
+        if SKIP_CUDA_TESTS:
+            raise SkipTest("not compiled with CUDA support")
+        model = AnalogLinear(
+            4, 3, bias=False, rpu_config=self._offload_rpu_config(OffloadDataType.BFLOAT16)
+        ).cuda()
+        reference_model = AnalogLinear(4, 3, bias=False, rpu_config=self._offload_rpu_config())
+        reference_model = reference_model.cuda()
+        tile = next(model.analog_tiles())
+        reference = next(reference_model.analog_tiles())
+        reference.set_weights(tile.get_weights()[0])
+        tile.set_learning_rate(0.1)
+        reference.set_learning_rate(0.1)
+        ctx, reference_ctx = tile.analog_ctx, reference.analog_ctx
+
+        x, d = randn(2, 4, device="cuda"), randn(2, 3, device="cuda")
+        model(x).backward(d)
+        reference_model(x).backward(d)
+
+        x_inputs, d_inputs = ctx.analog_input, ctx.analog_grad_output
+        self.assertEqual(x_inputs.device.type, "cpu")
+        self.assertEqual(x_inputs.dtype, torch.bfloat16)
+        self.assertEqual(d_inputs.dtype, torch.bfloat16)
+        expected_x = reference_ctx.analog_input.to(torch.bfloat16)
+        expected_d = reference_ctx.analog_grad_output.to(torch.bfloat16)
+        self.assertTrue(torch.equal(x_inputs, expected_x))
+        self.assertTrue(torch.equal(d_inputs, expected_d))
+
+        ctx.bulk_update()
+        reference.update_batched(expected_x.float().cuda(), expected_d.float().cuda())
+        self.assertTrue(allclose(tile.get_weights()[0], reference.get_weights()[0]))
+
+    def _assert_save_load_drops_trace(self, model, ctx):
+        self.assertTrue(ctx.has_gradient())
+        state = ctx.__getstate__()
+        self.assertIsNone(state["_trace_input"])
+        self.assertIsNone(state["_copy_stream"])
+
+        with TemporaryFile() as file:
+            torch.save(model, file)
+            file.seek(0)
+            new_model = torch.load(file, weights_only=False)
+
+        new_ctx = next(new_model.analog_tiles()).analog_ctx
+        self.assertFalse(new_ctx.has_gradient())
+        new_model(randn(2, 4, device=ctx.device)).sum().backward()
+        self.assertTrue(new_ctx.has_gradient())
+
+    def test_save_load_after_training_step(self):
+        """Saving the model after a step neither stores the trace nor fails."""
+        model, ctx = self._model_ctx()
+        model(randn(2, 4)).sum().backward()
+        self._assert_save_load_drops_trace(model, ctx)
+
+    def test_save_load_after_offload_step_cuda(self):
+        """The CUDA copy stream of offloaded gradients is not pickled."""
+        if SKIP_CUDA_TESTS:
+            raise SkipTest("not compiled with CUDA support")
+        model = AnalogLinear(4, 3, bias=False, rpu_config=self._offload_rpu_config()).cuda()
+        ctx = next(model.analog_tiles()).analog_ctx
+        model(randn(2, 4, device="cuda")).sum().backward()
+        self.assertIsNotNone(ctx._copy_stream)
+        self._assert_save_load_drops_trace(model, ctx)
+
+    def test_bulk_update_without_trace_is_noop(self):
+        """bulk_update() leaves the weights unchanged if no step is stored."""
+        model, ctx = self._model_ctx()
+        tile = next(model.analog_tiles())
+        weights = tile.get_weights()[0]
+
+        ctx.bulk_update()
+        self.assertTrue(torch.equal(tile.get_weights()[0], weights))
+
+    def test_set_indexed_rebinds_passes(self):
+        """A convolution switches its context to the indexed passes on forward."""
+        model = AnalogConv2d(2, 3, kernel_size=3, bias=False, rpu_config=FloatingPointRPUConfig())
+        tile = next(model.analog_tiles())
+        ctx = tile.analog_ctx
+        ctx.set_indexed(False)
+        self.assertEqual(ctx._fwd, tile.joint_forward)
+        self.assertEqual(ctx._bwd, tile.backward)
+
+        model(randn(2, 2, 5, 5))
+        self.assertTrue(ctx.use_indexed)
+        self.assertEqual(ctx._fwd, tile.joint_forward_indexed)
+        self.assertEqual(ctx._bwd, tile.backward_indexed)
+
+    def test_update_batched_matches_concatenated_update(self):
+        """update_batched() applies all steps like one update on the concatenated batch."""
+        model, _ = self._model_ctx()
+        reference_model, _ = self._model_ctx()
+        tile = next(model.analog_tiles())
+        reference = next(reference_model.analog_tiles())
+        reference.set_weights(tile.get_weights()[0])
+        tile.set_learning_rate(0.1)
+        reference.set_learning_rate(0.1)
+        x_inputs, d_inputs = randn(3, 2, 4), randn(3, 2, 3)
+
+        tile.update_batched(x_inputs, d_inputs)
+        reference.update(cat(tuple(x_inputs)), cat(tuple(d_inputs)))
+
+        self.assertTrue(allclose(tile.get_weights()[0], reference.get_weights()[0]))
+
+    def test_conv_optimizer_step_matches_per_step_updates(self):
+        """An indexed trace of two steps updates the tile like one update per step."""
+        model = AnalogConv2d(2, 3, kernel_size=3, bias=False, rpu_config=FloatingPointRPUConfig())
+        reference_model = AnalogConv2d(
+            2, 3, kernel_size=3, bias=False, rpu_config=FloatingPointRPUConfig()
+        )
+        tile = next(model.analog_tiles())
+        reference = next(reference_model.analog_tiles())
+        reference.set_weights(tile.get_weights()[0])
+        reference.set_learning_rate(0.1)
+        # Sets up the indices of the indexed update.
+        reference_model(randn(2, 2, 5, 5))
+        optimizer = AnalogSGD(model.parameters(), lr=0.1)
+        optimizer.regroup_param_groups(model)
+
+        for _ in range(2):
+            model(randn(2, 2, 5, 5)).sum().backward()
+        ctx = tile.analog_ctx
+        self.assertTrue(ctx.use_indexed)
+        x_inputs = ctx.analog_input.clone()
+        d_inputs = ctx.analog_grad_output.clone()
+        self.assertEqual(len(x_inputs), 2)
+        optimizer.step()
+
+        for x_input, d_input in zip(x_inputs, d_inputs):
+            reference.update_indexed(x_input, d_input)
+        reference.post_update_step()
+        self.assertTrue(allclose(tile.get_weights()[0], reference.get_weights()[0], atol=1e-6))
+
+    def test_buffer_pool_reuses_released_buffers(self):
+        """Released buffers are handed out again for the same layout, up to the bound."""
+        cpu = device("cpu")
+        pool = _BufferPool(max_bytes=24)
+        buffer = pool.acquire((2, 3), torch.float32, cpu)
+        other = pool.acquire((2, 3), torch.float32, cpu)
+
+        pool.release(buffer)
+        pool.release(other)  # pool is full: freed
+        self.assertIsNot(pool.acquire((3, 2), torch.float32, cpu), buffer)
+        self.assertIs(pool.acquire((2, 3), torch.float32, cpu), buffer)
+        self.assertIsNot(pool.acquire((2, 3), torch.float32, cpu), other)
+
+    def test_buffer_pool_is_bounded_by_bytes(self):
+        """Buffers larger than the bound are freed and clear() empties the pool."""
+        cpu = device("cpu")
+        pool = _BufferPool(max_bytes=24)
+        large = pool.acquire((4, 3), torch.float32, cpu)
+        pool.release(large)
+        self.assertIsNot(pool.acquire((4, 3), torch.float32, cpu), large)
+
+        small = pool.acquire((2, 3), torch.float32, cpu)
+        pool.release(small)
+        pool.clear()
+        self.assertIsNot(pool.acquire((2, 3), torch.float32, cpu), small)
+
+    def test_buffer_pool_clears_single_device(self):
+        """clear(device) keeps the buffers of the other devices."""
+        cpu = device("cpu")
+        pool = _BufferPool()
+        buffer = pool.acquire((2, 3), torch.float32, cpu)
+        pool.release(buffer)
+
+        pool.clear(device("cuda", 0))
+        self.assertIs(pool.acquire((2, 3), torch.float32, cpu), buffer)
+        pool.release(buffer)
+        pool.clear(cpu)
+        self.assertIsNot(pool.acquire((2, 3), torch.float32, cpu), buffer)
+        self.assertEqual(pool._bytes, {})
+
+    def test_clear_trace_buffers_empties_pool(self):
+        """clear_trace_buffers() frees the pooled buffers of the released traces."""
+        model, ctx = self._model_ctx()
+        model(randn(2, 4)).sum().backward()
+        ctx.reset()
+        self.assertNotEqual(_TRACE_BUFFER_POOL._bytes, {})
+
+        clear_trace_buffers("cpu")
+        self.assertEqual(_TRACE_BUFFER_POOL._bytes, {})
+
+    def test_move_frees_trace_memory_cuda(self):
+        """Moving the tile frees the CUDA trace buffers, also those in the pool."""
+        if SKIP_CUDA_TESTS:
+            raise SkipTest("not compiled with CUDA support")
+        model = AnalogLinear(64, 32, bias=False, rpu_config=FloatingPointRPUConfig()).cuda()
+        ctx = next(model.analog_tiles()).analog_ctx
+        for _ in range(3):
+            # The trace grows and releases the outgrown buffers to the pool.
+            model(randn(256, 64, device="cuda")).sum().backward()
+        trace_bytes = ctx._trace_input.nbytes + ctx._trace_grad.nbytes
+        torch.cuda.synchronize()
+        allocated = torch.cuda.memory_allocated()
+
+        model.cpu()
+        self.assertIsNone(ctx._trace_input)
+        self.assertNotIn((device("cuda", 0), False), _TRACE_BUFFER_POOL._bytes)
+        self.assertLessEqual(torch.cuda.memory_allocated(), allocated - trace_bytes)
+
+
+class AnalogCtxToTest(ParametrizedTestCase):
+    """``AnalogContext.to()`` moves the tile for device and tensor arguments."""
+
+    use_cuda = False
+
+    @staticmethod
+    def _tile_ctx():
+        model = AnalogLinear(4, 3, bias=False, rpu_config=FloatingPointRPUConfig())
+        tile = next(model.analog_tiles())
+        return tile, tile.analog_ctx
+
+    def test_to_same_device_keeps_raw_data(self):
+        """Arguments without a conversion keep the zero-copy raw data."""
+        tile, ctx = self._tile_ctx()
+        data_ptr = ctx._raw_data().data_ptr()
+
+        self.assertIs(ctx.to("cpu"), ctx)
+        self.assertIs(ctx.to(zeros(1)), ctx)
+        self.assertIs(ctx.to(memory_format=torch.contiguous_format), ctx)
+        self.assertEqual(ctx._raw_data().data_ptr(), data_ptr)
+        self.assertFalse(tile.is_cuda)
+
+    def test_to_dtype_converts_context_only(self):
+        """A data type is applied to the context but not to the tile."""
+        tile, ctx = self._tile_ctx()
+
+        ctx.to(torch.float64)
+        self.assertEqual(ctx.dtype, torch.float64)
+        self.assertEqual(tile.get_weights()[0].dtype, torch.float32)
+
+    def test_to_device_moves_tile_cuda(self):
+        """Device arguments move the tile and the context."""
+        if SKIP_CUDA_TESTS:
+            raise SkipTest("not compiled with CUDA support")
+        tile, ctx = self._tile_ctx()
+
+        ctx.to("cuda")
+        self.assertTrue(tile.is_cuda)
+        self.assertEqual(ctx.device.type, "cuda")
+        self.assertIs(tile.analog_ctx, ctx)
+
+        ctx.to(device="cpu")
+        self.assertFalse(tile.is_cuda)
+        self.assertEqual(ctx.device.type, "cpu")
+
+    def test_cpu_round_trip_keeps_data_view_in_sync_cuda(self):
+        """After cuda() / cpu() the data view follows the updated tile weights."""
+        if SKIP_CUDA_TESTS:
+            raise SkipTest("not compiled with CUDA support")
+        tile, ctx = self._tile_ctx()
+        tile.set_learning_rate(0.1)
+
+        self.assertIs(ctx.cuda(), ctx)
+        self.assertIs(ctx.cpu(), ctx)
+        self.assertFalse(tile.is_cuda)
+        self.assertIs(tile.analog_ctx, ctx)
+
+        tile.update(randn(2, 4), randn(2, 3))
+        ctx.enable_data_view()
+        self.assertEqual(ctx.device.type, "cpu")
+        self.assertTrue(allclose(ctx.data, tile.get_weights()[0]))
+
+    def test_to_tensor_moves_tile_cuda(self):
+        """Tensor arguments move the tile to the device of the tensor."""
+        if SKIP_CUDA_TESTS:
+            raise SkipTest("not compiled with CUDA support")
+        tile, ctx = self._tile_ctx()
+
+        ctx.to(zeros(1, device="cuda"))
+        self.assertTrue(tile.is_cuda)
+        self.assertEqual(ctx.device.type, "cuda")
+
+        ctx.to(zeros(1))
+        self.assertFalse(tile.is_cuda)
+        self.assertEqual(ctx.device.type, "cpu")